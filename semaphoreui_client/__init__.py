@@ -1 +1,2 @@
 from .client import SemaphoreUIClient as Client  # NOQA
+from .client import SemaphoreUIError  # NOQA
@@ -0,0 +1,337 @@
+import asyncio
+import functools
+import typing
+
+import httpx
+from requests.utils import select_proxy
+
+from .client import (
+    Environment,
+    Integration,
+    Inventory,
+    Key,
+    Project,
+    Repository,
+    Schedule,
+    SemaphoreUIClient,
+    SemaphoreUIError,
+    Task,
+    Template,
+    Token,
+    View,
+    _CREATED,
+    _D,
+    _NO_CONTENT,
+    _OK,
+    _dumps,
+    _loads,
+    _make_environment,
+    _make_integration,
+    _make_inventory,
+    _make_key,
+    _make_project,
+    _make_repository,
+    _make_schedule,
+    _make_task,
+    _make_template,
+    _make_token,
+    _make_view,
+    _ssl_context,
+)
+
+
+class AsyncSemaphoreUIClient:
+    """An asyncio client for the Semaphore UI api.
+
+    Objects returned from this client are bound to a synchronous
+    `SemaphoreUIClient` that shares the same cookie jar, so their own
+    methods (`save`, `delete`, etc.) keep working as usual. Use this
+    client when many independent requests can be issued concurrently.
+    """
+
+    def __init__(
+        self,
+        host: typing.Optional[str] = None,
+        path: str = "/api",
+        max_concurrency: int = 64,
+        *,
+        client: typing.Optional[SemaphoreUIClient] = None,
+    ):
+        if client is None:
+            if host is None:
+                raise TypeError("Either host or client is required")
+            client = SemaphoreUIClient(host, path)
+            # The client was made here, so closing this closes it too.
+            self._owns_client = True
+        else:
+            self._owns_client = False
+        self.client = client
+        self.api_endpoint = client.api_endpoint
+        session = client.http
+        # Use the tls and proxy settings requests would use for the api,
+        # including those from the environment.
+        settings = session.merge_environment_settings(
+            self.api_endpoint, {}, None, None, None
+        )
+        cert = settings["cert"]
+        proxies = settings["proxies"]
+        self.http = httpx.AsyncClient(
+            http2=True,
+            cookies=session.cookies,
+            # Includes a token set with `login_with_token`. Connection
+            # specific headers are forbidden in HTTP/2.
+            headers={
+                name: value
+                for name, value in session.headers.items()
+                if isinstance(value, str)
+                and name.lower() not in ("connection", "keep-alive")
+            },
+            verify=_ssl_context(
+                settings["verify"], tuple(cert) if isinstance(cert, list) else cert
+            ),
+            proxy=select_proxy(self.api_endpoint, proxies) if proxies else None,
+            trust_env=False,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+                keepalive_expiry=30,
+            ),
+        )
+        # Bound the requests in flight, so a large gather() queues here
+        # instead of in the connection pool where it could time out.
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @classmethod
+    def from_client(
+        cls, client: SemaphoreUIClient, max_concurrency: int = 64
+    ) -> "AsyncSemaphoreUIClient":
+        """Create an async client sharing the session of `client`."""
+        return cls(client=client, max_concurrency=max_concurrency)
+
+    async def __aenter__(self) -> "AsyncSemaphoreUIClient":
+        return self
+
+    async def __aexit__(self, *args: typing.Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+        if self._owns_client:
+            self.client.close()
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        expect: typing.Container[int],
+        **kwargs: typing.Any,
+    ) -> httpx.Response:
+        """Send a request, raising `SemaphoreUIError` on an unexpected status."""
+        if "json" in kwargs:
+            kwargs["content"] = _dumps(kwargs.pop("json"))
+            kwargs["headers"] = {
+                **kwargs.get("headers", {}),
+                "Content-Type": "application/json",
+            }
+        if method != "GET":
+            # Expire the bodies cached by the wrapped client, as it does.
+            self.client._cache_generation += 1
+        async with self._semaphore:
+            response = await self.http.request(method, url, **kwargs)
+        if response.status_code not in expect:
+            raise SemaphoreUIError(
+                method, url, response.status_code, response.reason_phrase
+            )
+        return response
+
+    async def _get_list(
+        self, url: str, make: typing.Callable[..., _D]
+    ) -> typing.List[_D]:
+        """GET a json array, building one object per row with `make`."""
+        response = await self._request("GET", url, expect=_OK)
+        return list(
+            map(functools.partial(make, client=self.client), _loads(response.content))
+        )
+
+    async def login(self, user: str, password: str) -> None:
+        self.client.invalidate()
+        try:
+            await self._request(
+                "POST",
+                self.client._urls.login,
+                json={"auth": user, "password": password},
+                expect=_NO_CONTENT,
+            )
+        except SemaphoreUIError as e:
+            raise ValueError(
+                f"Username and/or password incorrect. Response from POST /auth/login was {e.status_code}"
+            ) from e
+
+    def login_with_token(self, token: str) -> None:
+        """Authenticate every request with an api token.
+
+        The wrapped client forgets what it cached for the previous user.
+        """
+        self.client.login_with_token(token)
+        self.http.headers["Authorization"] = f"Bearer {token}"
+
+    async def whoami(self) -> None:
+        await self._request("GET", self.client._urls.login, expect=_OK)
+
+    async def logout(self) -> None:
+        self.client.invalidate()
+        try:
+            await self._request("POST", self.client._urls.logout, expect=_NO_CONTENT)
+        finally:
+            # Also forget a token set with `login_with_token`.
+            self.http.headers.pop("Authorization", None)
+            self.client.http.headers.pop("Authorization", None)
+
+    async def tokens(self) -> typing.List[Token]:
+        return await self._get_list(self.client._urls.tokens, _make_token)
+
+    async def create_token(self) -> Token:
+        response = await self._request(
+            "POST", self.client._urls.tokens, expect=_CREATED
+        )
+        return _make_token(_loads(response.content), client=self.client)
+
+    async def projects(self) -> typing.List[Project]:
+        return await self._get_list(self.client._urls.projects, _make_project)
+
+    async def get_project(self, id: int) -> Project:
+        response = await self._request("GET", self.client._urls.project(id), expect=_OK)
+        return _make_project(_loads(response.content), client=self.client)
+
+    async def create_project(
+        self,
+        name: str,
+        alert: bool,
+        alert_chat: str,
+        max_parallel_tasks: int,
+        type: typing.Optional[str] = None,
+        demo: typing.Optional[bool] = False,
+    ) -> Project:
+        response = await self._request(
+            "POST",
+            self.client._urls.projects,
+            json={
+                "name": name,
+                "alert": alert,
+                "alert_chat": alert_chat,
+                "max_parallel_tasks": max_parallel_tasks,
+                "type": type,
+                "demo": demo,
+            },
+            expect=_CREATED,
+        )
+        return _make_project(_loads(response.content), client=self.client)
+
+    async def fetch_all(
+        self, project_ids: typing.Iterable[int]
+    ) -> typing.List[Project]:
+        """Fetch several projects concurrently."""
+        return await asyncio.gather(*[self.get_project(id) for id in project_ids])
+
+    async def get_projects_bulk(
+        self, project_ids: typing.Iterable[int]
+    ) -> typing.List[typing.Union[Project, BaseException]]:
+        """Fetch several projects concurrently, collecting failures.
+
+        Unlike `fetch_all`, one failed request doesn't abort the rest:
+        its exception is returned in place of the project.
+        """
+        return await asyncio.gather(
+            *[self.get_project(id) for id in project_ids], return_exceptions=True
+        )
+
+    async def tasks(self, project_id: int) -> typing.List[Task]:
+        return await self._get_list(
+            self.client._urls.project_tasks(project_id), _make_task
+        )
+
+    async def get_task(self, project_id: int, task_id: int) -> Task:
+        response = await self._request(
+            "GET", self.client._urls.project_task(project_id, task_id), expect=_OK
+        )
+        return _make_task(_loads(response.content), client=self.client)
+
+    async def get_many_tasks(
+        self, project_id: int, task_ids: typing.Iterable[int]
+    ) -> typing.List[Task]:
+        """Fetch several tasks of a project concurrently."""
+        return await asyncio.gather(*[self.get_task(project_id, id) for id in task_ids])
+
+    async def keys(self, project_id: int) -> typing.List[Key]:
+        return await self._get_list(
+            self.client._urls.project_keys(project_id), _make_key
+        )
+
+    async def repositories(self, project_id: int) -> typing.List[Repository]:
+        return await self._get_list(
+            self.client._urls.project_repositories(project_id), _make_repository
+        )
+
+    async def environments(self, project_id: int) -> typing.List[Environment]:
+        return await self._get_list(
+            self.client._urls.project_environments(project_id), _make_environment
+        )
+
+    async def views(self, project_id: int) -> typing.List[View]:
+        return await self._get_list(
+            self.client._urls.project_views(project_id), _make_view
+        )
+
+    async def inventories(self, project_id: int) -> typing.List[Inventory]:
+        return await self._get_list(
+            self.client._urls.project_inventories(project_id), _make_inventory
+        )
+
+    async def templates(self, project_id: int) -> typing.List[Template]:
+        return await self._get_list(
+            self.client._urls.project_templates(project_id), _make_template
+        )
+
+    async def schedules(self, project_id: int) -> typing.List[Schedule]:
+        return await self._get_list(
+            self.client._urls.project_schedules(project_id), _make_schedule
+        )
+
+    async def integrations(self, project_id: int) -> typing.List[Integration]:
+        return await self._get_list(
+            self.client._urls.project_integrations(project_id), _make_integration
+        )
+
+    async def fetch_project_resources(
+        self, project_id: int
+    ) -> typing.Dict[str, typing.List[typing.Any]]:
+        """Fetch all the listings of a project concurrently, keyed by kind."""
+        fetches: typing.Dict[
+            str, typing.Callable[[int], typing.Awaitable[typing.List[typing.Any]]]
+        ] = {
+            "templates": self.templates,
+            "keys": self.keys,
+            "repositories": self.repositories,
+            "environments": self.environments,
+            "views": self.views,
+            "inventories": self.inventories,
+            "schedules": self.schedules,
+            "tasks": self.tasks,
+        }
+        results = await asyncio.gather(
+            *[fetch(project_id) for fetch in fetches.values()]
+        )
+        return dict(zip(fetches, results))
+
+    async def gather_tasks(
+        self, project_ids: typing.Iterable[int], concurrency: int = 16
+    ) -> typing.List[typing.List[Task]]:
+        """Fetch the tasks of several projects, at most `concurrency` at a time."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(project_id: int) -> typing.List[Task]:
+            async with semaphore:
+                return await self.tasks(project_id)
+
+        return await asyncio.gather(*[one(id) for id in project_ids])
@@ -1,57 +1,652 @@
+import asyncio
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import functools
+import itertools
 from dataclasses import dataclass, field
+import json
+import operator
+import os
+import ssl
+import sys
+import time
 import typing
 
-from dataclasses_json import dataclass_json
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, select_proxy
+from urllib3.util import Retry, make_headers
+
+from .__about__ import __version__
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:  # no cov
+    _loads = json.loads  # type: ignore[assignment]
+
+    def _dumps(obj: typing.Any) -> bytes:  # type: ignore[misc]
+        return json.dumps(obj).encode()
+
+
+if typing.TYPE_CHECKING:
+    from http.cookiejar import CookieJar
+
+    import httpx
+
+    from .aclient import AsyncSemaphoreUIClient
+
+    from _typeshed import DataclassInstance
+
+_D = typing.TypeVar("_D", bound="DataclassInstance")
+_T = typing.TypeVar("_T")
+
+
+_USER_AGENT = f"semaphoreui-client/{__version__}"
+
+# Expected response statuses, built once rather than per request.
+_OK = frozenset([200])
+_CREATED = frozenset([201])
+_NO_CONTENT = frozenset([204])
+
+# Task statuses after which a task won't change anymore.
+_TASK_FINISHED = frozenset(["success", "error", "stopped", "rejected", "not_executed"])
+
+
+class _Named(typing.Protocol):
+    name: str
+
+
+_N = typing.TypeVar("_N", bound=_Named)
+
+
+class _Deletable(typing.Protocol):
+    def delete(self) -> None: ...
+
+
+class _Saveable(typing.Protocol):
+    client: "SemaphoreUIClient"
+    _saved: typing.Optional[typing.Dict[str, typing.Any]]
+
+
+class SemaphoreUIError(Exception):
+    """The api responded with an unexpected status code."""
+
+    def __init__(self, method: str, url: str, status_code: int, reason: str = ""):
+        super().__init__(f"{method} {url} returned {status_code} {reason}".rstrip())
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+
+
+class _Urls:
+    """Url builders for an api endpoint.
+
+    Each template is formatted against the endpoint once, up front, so
+    building a url on a request is a single `str.format` call.
+    """
+
+    def __init__(self, api_endpoint: str):
+        self.login = f"{api_endpoint}/auth/login"
+        self.logout = f"{api_endpoint}/auth/logout"
+        self.tokens = f"{api_endpoint}/user/tokens"
+        self.token = f"{api_endpoint}/user/tokens/{{}}".format
+        self.projects = f"{api_endpoint}/projects"
+        self.events = f"{api_endpoint}/events"
+        self.project = f"{api_endpoint}/project/{{}}".format
+        self.project_backup = f"{api_endpoint}/project/{{}}/backup".format
+        self.project_role = f"{api_endpoint}/project/{{}}/role".format
+        self.project_events = f"{api_endpoint}/project/{{}}/events".format
+        self.project_users = f"{api_endpoint}/project/{{}}/users".format
+        self.project_user = f"{api_endpoint}/project/{{}}/users/{{}}".format
+        self.project_keys = f"{api_endpoint}/project/{{}}/keys".format
+        self.project_key = f"{api_endpoint}/project/{{}}/keys/{{}}".format
+        self.project_repositories = f"{api_endpoint}/project/{{}}/repositories".format
+        self.project_repository = (
+            f"{api_endpoint}/project/{{}}/repositories/{{}}".format
+        )
+        self.project_environments = f"{api_endpoint}/project/{{}}/environment".format
+        self.project_environment = (
+            f"{api_endpoint}/project/{{}}/environment/{{}}".format
+        )
+        self.project_views = f"{api_endpoint}/project/{{}}/views".format
+        self.project_view = f"{api_endpoint}/project/{{}}/views/{{}}".format
+        self.project_inventories = f"{api_endpoint}/project/{{}}/inventory".format
+        self.project_inventory = f"{api_endpoint}/project/{{}}/inventory/{{}}".format
+        self.project_templates = f"{api_endpoint}/project/{{}}/templates".format
+        self.project_template = f"{api_endpoint}/project/{{}}/templates/{{}}".format
+        self.project_template_last_tasks = (
+            f"{api_endpoint}/project/{{}}/templates/{{}}/tasks/last".format
+        )
+        self.project_schedules = f"{api_endpoint}/project/{{}}/schedules".format
+        self.project_schedule = f"{api_endpoint}/project/{{}}/schedules/{{}}".format
+        self.project_tasks = f"{api_endpoint}/project/{{}}/tasks".format
+        self.project_task = f"{api_endpoint}/project/{{}}/tasks/{{}}".format
+        self.project_task_stop = f"{api_endpoint}/project/{{}}/tasks/{{}}/stop".format
+        self.project_task_output = (
+            f"{api_endpoint}/project/{{}}/tasks/{{}}/output".format
+        )
+        self.project_integrations = f"{api_endpoint}/project/{{}}/integrations".format
+        self.project_integration = (
+            f"{api_endpoint}/project/{{}}/integrations/{{}}".format
+        )
+
+
+# Retry gateway errors from a proxy in front of the api.
+_RETRY = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=[502, 503, 504],
+    # POST isn't idempotent; retrying it could create duplicates.
+    allowed_methods=frozenset(["GET", "PUT", "DELETE"]),
+    raise_on_status=False,
+)
+
+
+class _HTTPXAdapter(BaseAdapter):
+    """A requests adapter sending requests over an HTTP/2 httpx client.
+
+    Concurrent requests are multiplexed over a single connection when
+    the server negotiates HTTP/2. Responses are read in full, so
+    `stream=True` has no effect. This requires the `async` extra.
+    """
+
+    def __init__(self, cookies: "CookieJar", pool_maxsize: int):
+        super().__init__()
+        self._cookies = cookies
+        self._pool_maxsize = pool_maxsize
+        # httpx takes tls and proxy settings per client rather than per
+        # request, so there is one client per combination in use;
+        # usually that's just one.
+        self._clients: typing.Dict[
+            typing.Tuple[typing.Any, typing.Any, typing.Optional[str]],
+            "httpx.Client",
+        ] = {}
+
+    def _client(
+        self, verify: typing.Any, cert: typing.Any, proxy: typing.Optional[str]
+    ) -> "httpx.Client":
+        import httpx
+
+        key = (verify, cert, proxy)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = httpx.Client(
+                http2=True,
+                # Sharing the session's cookie jar lets httpx store the
+                # cookies it receives, which requests can't extract from
+                # our responses.
+                cookies=self._cookies,
+                limits=httpx.Limits(
+                    max_connections=self._pool_maxsize,
+                    max_keepalive_connections=self._pool_maxsize,
+                ),
+                timeout=httpx.Timeout(10.0),
+                # The session has already applied the environment's
+                # settings when merging verify and proxies.
+                trust_env=False,
+                transport=httpx.HTTPTransport(
+                    http2=True,
+                    verify=_ssl_context(verify, cert),
+                    proxy=proxy,
+                    retries=3,
+                ),
+            )
+        return client
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: typing.Any = None,
+        verify: typing.Any = True,
+        cert: typing.Any = None,
+        proxies: typing.Any = None,
+    ) -> requests.Response:
+        import httpx
+
+        assert request.method is not None and request.url is not None
+        client = self._client(
+            verify,
+            tuple(cert) if isinstance(cert, list) else cert,
+            select_proxy(request.url, proxies) if proxies else None,
+        )
+        if timeout is None:
+            timeout = client.timeout
+        elif isinstance(timeout, tuple):
+            # requests takes a (connect, read) pair.
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        # Connection-specific headers are forbidden in HTTP/2.
+        headers = {
+            name: value
+            for name, value in request.headers.items()
+            if name.lower() not in ("connection", "keep-alive")
+        }
+        for attempt in itertools.count():
+            # Raise the exceptions requests would, so callers handling
+            # those don't need to know about the transport.
+            try:
+                response = client.request(
+                    request.method,
+                    request.url,
+                    headers=headers,
+                    content=request.body,
+                    timeout=timeout,
+                )
+            except httpx.ConnectTimeout as e:
+                raise requests.ConnectTimeout(e, request=request) from e
+            except httpx.TimeoutException as e:
+                raise requests.Timeout(e, request=request) from e
+            except httpx.TransportError as e:
+                raise requests.ConnectionError(e, request=request) from e
+            # Apply the same status retries as the requests transport.
+            if attempt == _RETRY.total or not _RETRY.is_retry(
+                request.method, response.status_code
+            ):
+                break
+            time.sleep(_RETRY.backoff_factor * 2**attempt)
+        built = requests.Response()
+        built.status_code = response.status_code
+        built.headers = CaseInsensitiveDict(response.headers)
+        built.encoding = response.encoding
+        built.reason = response.reason_phrase
+        built.url = request.url
+        built.request = request
+        built._content = response.content
+        built._content_consumed = True  # type: ignore[attr-defined]
+        return built
+
+    def close(self) -> None:
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+
+
+def _ssl_context(verify: typing.Any, cert: typing.Any) -> ssl.SSLContext:
+    """Build the ssl context for requests' `verify` and `cert` settings."""
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    else:
+        path = DEFAULT_CA_BUNDLE_PATH if verify is True else verify
+        if os.path.isdir(path):
+            context = ssl.create_default_context(capath=path)
+        else:
+            context = ssl.create_default_context(cafile=path)
+    if isinstance(cert, tuple):
+        context.load_cert_chain(*cert)
+    elif cert:
+        context.load_cert_chain(cert)
+    return context
 
 
 class SemaphoreUIClient:
-    def __init__(self, host: str, path: str = "/api"):
+    def __init__(
+        self,
+        host: str,
+        path: str = "/api",
+        pool_maxsize: int = 64,
+        transport: typing.Literal["requests", "httpx"] = "requests",
+        cache_ttl: float = 0,
+    ):
         self.http = requests.Session()
+        adapter: BaseAdapter
+        if transport == "httpx":
+            adapter = _HTTPXAdapter(self.http.cookies, pool_maxsize)
+        else:
+            # Keep enough connections alive to the api host that bursts of
+            # concurrent requests don't pay for a fresh TCP+TLS handshake.
+            # pool_connections counts hosts, and the client only talks to
+            # one; pool_maxsize is what bounds connections to it.
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=pool_maxsize, max_retries=_RETRY
+            )
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.http.headers.update(
+            {
+                "Accept": "application/json",
+                # Includes br (and zstd) when urllib3 can decode them.
+                "Accept-Encoding": make_headers(accept_encoding=True)[
+                    "accept-encoding"
+                ],
+                "Connection": "keep-alive",
+                "User-Agent": _USER_AGENT,
+            }
+        )
+        self._pool_maxsize = pool_maxsize
         if host.endswith("/"):
             host = host.strip("/")
         if not path.startswith("/"):
             path = f"/{path}"
         self.api_endpoint = f"{host}{path}"
+        self._urls = _Urls(self.api_endpoint)
+        # Cached bodies, with their ETag, the time until which they are
+        # served without asking the server, and the write generation they
+        # were fetched in.
+        self._etag_cache: typing.Dict[
+            typing.Tuple[str, typing.FrozenSet[typing.Tuple[str, str]]],
+            typing.Tuple[typing.Optional[str], bytes, float, int],
+        ] = {}
+        self._cache_ttl = cache_ttl
+        # Bumped by every non-GET request; copies from an older generation
+        # are revalidated even within their ttl.
+        self._cache_generation = 0
+        self._project_cache: typing.Dict[int, "Project"] = {}
+        self._repository_cache: typing.Dict[typing.Tuple[int, int], "Repository"] = {}
+        self._token_cache: typing.Optional[typing.List["Token"]] = None
+
+    def __enter__(self) -> "SemaphoreUIClient":
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the session, releasing its pooled connections."""
+        self.http.close()
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        expect: typing.Container[int],
+        **kwargs: typing.Any,
+    ) -> requests.Response:
+        """Send a request, raising `SemaphoreUIError` on an unexpected status."""
+        if "json" in kwargs:
+            # Encode bodies ourselves rather than letting requests use the
+            # (slower) stdlib json module.
+            kwargs["data"] = _dumps(kwargs.pop("json"))
+            kwargs["headers"] = {
+                **kwargs.get("headers", {}),
+                "Content-Type": "application/json",
+            }
+        if method != "GET":
+            # Any change may affect cached listings; make them revalidate.
+            self._cache_generation += 1
+        response = self.http.request(method, url, **kwargs)
+        if response.status_code not in expect:
+            raise SemaphoreUIError(
+                method, url, response.status_code, response.reason or ""
+            )
+        return response
 
-    def login(self, user: str, password: str) -> None:
-        response = self.http.post(
-            f"{self.api_endpoint}/auth/login", json={"auth": user, "password": password}
+    def _json(self, response: requests.Response) -> typing.Any:
+        """Decode a json response body straight from its bytes."""
+        return _loads(response.content)
+
+    def _get_list(
+        self,
+        url: str,
+        make: typing.Callable[..., _D],
+        params: typing.Optional[typing.Mapping[str, typing.Any]] = None,
+        *,
+        revalidate: bool = False,
+        **extra: typing.Any,
+    ) -> typing.List[_D]:
+        """GET a json array, building one object per row with `make`.
+
+        With `revalidate`, the array goes through the ETag cache of
+        `_get_json_revalidated`.
+        """
+        if revalidate:
+            rows = self._get_json_revalidated(url, params)
+        else:
+            rows = self._json(self._request("GET", url, params=params, expect=_OK))
+        return list(map(functools.partial(make, client=self, **extra), rows))
+
+    def _get_json_revalidated(
+        self,
+        url: str,
+        params: typing.Optional[typing.Mapping[str, typing.Any]] = None,
+        *,
+        fresh: bool = False,
+    ) -> typing.Any:
+        """GET a json document, revalidating the last copy with its ETag.
+
+        When the server answers 304 Not Modified, the previous body is
+        decoded again rather than downloaded. The body is kept as bytes,
+        and callers get freshly decoded objects they are free to mutate.
+
+        With a `cache_ttl`, a copy younger than the ttl is used without
+        a request at all. Any non-GET request through the client expires
+        all copies, so the client's own changes are seen immediately.
+        With `fresh`, the ttl is ignored and the copy is always
+        revalidated, for reads that must see changes made elsewhere.
+        """
+        key = (url, frozenset((params or {}).items()))
+        generation = self._cache_generation
+        cached = self._etag_cache.get(key)
+        if (
+            cached is not None
+            and not fresh
+            and cached[3] == generation
+            and time.monotonic() < cached[2]
+        ):
+            return _loads(cached[1])
+        headers = (
+            {"If-None-Match": cached[0]}
+            if cached is not None and cached[0] is not None
+            else {}
         )
-        if response.status_code != 204:
-            raise ValueError(
-                f"Username and/or password incorrect. Response from POST /auth/login was {response.status_code}"
+        response = self._request(
+            "GET", url, params=params, headers=headers, expect=(200, 304)
+        )
+        if response.status_code == 304 and cached is not None:
+            self._etag_cache[key] = (
+                cached[0],
+                cached[1],
+                time.monotonic() + self._cache_ttl,
+                generation,
+            )
+            return _loads(cached[1])
+        etag = response.headers.get("ETag")
+        if etag is not None or self._cache_ttl:
+            self._etag_cache[key] = (
+                etag,
+                response.content,
+                time.monotonic() + self._cache_ttl,
+                generation,
             )
+        return self._json(response)
+
+    def login(self, user: str, password: str) -> None:
+        self.invalidate()
+        try:
+            self._request(
+                "POST",
+                self._urls.login,
+                json={"auth": user, "password": password},
+                expect=_NO_CONTENT,
+            )
+        except SemaphoreUIError as e:
+            raise ValueError(
+                f"Username and/or password incorrect. Response from POST /auth/login was {e.status_code}"
+            ) from e
+
+    def login_with_token(self, token: str) -> None:
+        """Authenticate every request with an api token.
+
+        Unlike `login`, this needs no request, and the client holds no
+        session state, so short-lived clients can skip the login
+        round-trip by reusing a token from `create_token`.
+        """
+        self.invalidate()
+        self.http.headers["Authorization"] = f"Bearer {token}"
 
     def whoami(self) -> None:
-        response = self.http.get(f"{self.api_endpoint}/auth/login")
-        assert response.status_code == 200, (
-            f"GET /auth/login return response {response.status_code}"
-        )
+        self._request("GET", self._urls.login, expect=_OK)
 
     def logout(self) -> None:
-        response = self.http.post(f"{self.api_endpoint}/auth/logout")
-        assert response.status_code == 204
+        self.invalidate()
+        try:
+            self._request("POST", self._urls.logout, expect=_NO_CONTENT)
+        finally:
+            # Also forget a token set with `login_with_token`.
+            self.http.headers.pop("Authorization", None)
 
     def tokens(self) -> typing.List["Token"]:
-        response = self.http.get(f"{self.api_endpoint}/user/tokens")
-        assert response.status_code == 200
-        return [Token(**token_data, client=self) for token_data in response.json()]
+        tokens = self._get_list(self._urls.tokens, _make_token)
+        self._token_cache = list(tokens)
+        return tokens
 
     def create_token(self) -> "Token":
-        response = self.http.post(f"{self.api_endpoint}/user/tokens")
-        assert response.status_code == 201
-        return Token(**response.json(), client=self)
+        response = self._request("POST", self._urls.tokens, expect=_CREATED)
+        token = _make_token(self._json(response), client=self)
+        if self._token_cache is not None:
+            self._token_cache.append(token)
+        return token
+
+    def create_and_list_tokens(self) -> typing.List["Token"]:
+        """Create a token, and return all tokens including the new one.
+
+        The api doesn't return the updated list when creating a token,
+        so the list from the last `tokens` call is updated locally
+        instead of being fetched again.
+        """
+        self.create_token()
+        if self._token_cache is None:
+            return self.tokens()
+        return list(self._token_cache)
 
     def projects(self) -> typing.List["Project"]:
-        response = self.http.get(f"{self.api_endpoint}/projects")
-        assert response.status_code == 200
-        return [Project(**data, client=self) for data in response.json()]
+        return self._get_list(self._urls.projects, _make_project, revalidate=True)
+
+    def projects_iter(self) -> typing.Iterator["Project"]:
+        """Yield projects as the listing is downloaded.
+
+        The api doesn't paginate projects, so the listing is streamed
+        and decoded item by item instead of as one document.
+        """
+        with self._request(
+            "GET", self._urls.projects, stream=True, expect=_OK
+        ) as response:
+            for data in _iter_json_array(response.iter_content(chunk_size=65536)):
+                yield _make_project(data, client=self)
+
+    def get_project(self, id: int, cached: bool = False) -> "Project":
+        """Fetch a project.
+
+        With `cached=True`, a project already fetched by this client is
+        returned without a request; use `Project.refresh` to reload it.
+        """
+        if cached:
+            project = self._project_cache.get(id)
+            if project is not None:
+                return project
+        project = _make_project(
+            self._get_json_revalidated(self._urls.project(id)), client=self
+        )
+        self._project_cache[id] = project
+        return project
+
+    def _run_async(
+        self,
+        call: typing.Callable[
+            ["AsyncSemaphoreUIClient"], typing.Coroutine[typing.Any, typing.Any, _T]
+        ],
+    ) -> _T:
+        """Run `call` with an async client sharing this client's session.
+
+        This requires the `async` extra to be installed. The event loop is
+        started with `asyncio.run`, so this raises `RuntimeError` when
+        called from a running event loop; use `AsyncSemaphoreUIClient`
+        directly there.
+        """
+        from .aclient import AsyncSemaphoreUIClient
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "Can't run from a running event loop; use AsyncSemaphoreUIClient"
+            )
+
+        async def run() -> _T:
+            async with AsyncSemaphoreUIClient.from_client(self) as aclient:
+                return await call(aclient)
+
+        return asyncio.run(run())
+
+    def get_projects(self, ids: typing.Iterable[int]) -> typing.List["Project"]:
+        """Fetch several projects concurrently.
+
+        This requires the `async` extra, and can't be called from a
+        running event loop.
+        """
+        return self._run_async(lambda aclient: aclient.fetch_all(ids))
+
+    def tasks_for_projects(
+        self, ids: typing.Iterable[int]
+    ) -> typing.List[typing.List["Task"]]:
+        """Fetch the tasks of several projects concurrently.
+
+        This requires the `async` extra, and can't be called from a
+        running event loop.
+        """
+        return self._run_async(lambda aclient: aclient.gather_tasks(ids))
+
+    def get_many_tasks(
+        self, project_id: int, task_ids: typing.Iterable[int]
+    ) -> typing.List["Task"]:
+        """Fetch several tasks of a project concurrently.
+
+        This requires the `async` extra, and can't be called from a
+        running event loop.
+        """
+        return self._run_async(
+            lambda aclient: aclient.get_many_tasks(project_id, task_ids)
+        )
+
+    def get_repository(
+        self, project_id: int, repository_id: int, cached: bool = False
+    ) -> "Repository":
+        """Fetch a repository.
+
+        With `cached=True`, a repository already fetched by this client
+        is returned without a request.
+        """
+        key = (project_id, repository_id)
+        if cached:
+            repository = self._repository_cache.get(key)
+            if repository is not None:
+                return repository
+        repository = _make_repository(
+            self._get_json_revalidated(
+                self._urls.project_repository(project_id, repository_id)
+            ),
+            client=self,
+        )
+        self._repository_cache[key] = repository
+        return repository
+
+    def invalidate(self) -> None:
+        """Forget the projects, repositories and tokens held by the client.
 
-    def get_project(self, id: int) -> "Project":
-        response = self.http.get(f"{self.api_endpoint}/project/{id}")
-        assert response.status_code == 200
-        return Project(**response.json(), client=self)
+        These belong to the logged in user, so this is also done on
+        `login`, `login_with_token` and `logout`. Cached response bodies
+        are expired too, so the next read revalidates them.
+        """
+        self._cache_generation += 1
+        self._project_cache.clear()
+        self._repository_cache.clear()
+        self._token_cache = None
+
+    def get_task(self, project_id: int, task_id: int) -> "Task":
+        response = self._request(
+            "GET", self._urls.project_task(project_id, task_id), expect=_OK
+        )
+        return _make_task(self._json(response), client=self)
 
     def create_project(
         self,
@@ -62,8 +657,9 @@ class SemaphoreUIClient:
         type: typing.Optional[str] = None,
         demo: typing.Optional[bool] = False,
     ) -> "Project":
-        response = self.http.post(
-            f"{self.api_endpoint}/projects",
+        response = self._request(
+            "POST",
+            self._urls.projects,
             json={
                 "name": name,
                 "alert": alert,
@@ -72,12 +668,160 @@ class SemaphoreUIClient:
                 "type": type,
                 "demo": demo,
             },
+            expect=_CREATED,
         )
-        assert response.status_code == 201
-        return Project(**response.json(), client=self)
+        return _make_project(self._json(response), client=self)
+
+    def bulk_add_project_users(
+        self,
+        project_id: int,
+        users: typing.Iterable["ProjectUser"],
+        max_workers: typing.Optional[int] = None,
+    ) -> None:
+        """Add several users to a project concurrently.
+
+        The api has no batch endpoint for project users, so the requests
+        are issued through `bulk`.
+        """
+        url = self._urls.project_users(project_id)
+        self.bulk(
+            [
+                functools.partial(
+                    self._request,
+                    "POST",
+                    url,
+                    json=user.to_dict(),
+                    expect=_NO_CONTENT,
+                )
+                for user in users
+            ],
+            max_workers=max_workers,
+        )
+
+    def bulk(
+        self,
+        calls: typing.Iterable[typing.Callable[[], _T]],
+        max_workers: typing.Optional[int] = None,
+    ) -> typing.List[_T]:
+        """Run several calls concurrently, returning their results in order.
+
+        Calls are run from a thread pool as large as the connection pool
+        unless `max_workers` is given, so every worker has a kept-alive
+        connection to use. The first exception raised by a call is raised
+        here.
+        """
+        with ThreadPoolExecutor(
+            max_workers=max_workers or self._pool_maxsize
+        ) as executor:
+            futures = [executor.submit(call) for call in calls]
+            return [future.result() for future in futures]
+
+    def map_projects(
+        self,
+        fn: typing.Callable[["Project"], _T],
+        projects: typing.Optional[typing.Iterable["Project"]] = None,
+    ) -> typing.List[_T]:
+        """Call `fn` on each project concurrently, returning the results.
+
+        `projects` defaults to all projects, e.g.
+        `client.map_projects(Project.tasks)` lists every project's tasks.
+        """
+        if projects is None:
+            projects = self.projects()
+        return self.bulk([functools.partial(fn, project) for project in projects])
+
+    def bulk_delete(self, items: typing.Iterable["_Deletable"]) -> None:
+        """Delete several objects concurrently."""
+        self.bulk([item.delete for item in items])
+
+    def stop_and_delete_tasks(
+        self, project_id: int, task_ids: typing.Iterable[int], force: bool = False
+    ) -> None:
+        """Stop and then delete several tasks of a project concurrently.
+
+        Each task's stop and delete are sent one after the other, while
+        different tasks are handled in parallel by a thread pool. This
+        gets most of the benefit of pipelining without depending on the
+        server supporting it.
+        """
+
+        def stop_and_delete(task_id: int) -> None:
+            self._request(
+                "POST",
+                self._urls.project_task_stop(project_id, task_id),
+                json={"force": force},
+                expect=_NO_CONTENT,
+            )
+            self._request(
+                "DELETE",
+                self._urls.project_task(project_id, task_id),
+                expect=_NO_CONTENT,
+            )
+
+        self.bulk([functools.partial(stop_and_delete, id) for id in task_ids])
+
+    def get_events_for_projects(
+        self, ids: typing.Iterable[int]
+    ) -> typing.Dict[int, typing.List["Event"]]:
+        """Fetch the events of several projects, keyed by project id.
+
+        The events of all the user's projects are fetched in a single
+        request and grouped. Servers without the `/events` endpoint are
+        queried per project from a thread pool instead.
+        """
+        events: typing.Dict[int, typing.List[Event]] = {id: [] for id in ids}
+        response = self._request("GET", self._urls.events, expect=(200, 404))
+        if response.status_code == 404:
+            fetched = self.bulk(
+                [
+                    functools.partial(
+                        self._get_json_revalidated, self._urls.project_events(id)
+                    )
+                    for id in events
+                ]
+            )
+            for id, rows in zip(events, fetched):
+                events[id] = [_make_event(_intern_event_fields(data)) for data in rows]
+            return events
+        for data in self._json(response):
+            project_events = events.get(data.get("project_id"))
+            if project_events is not None:
+                project_events.append(_make_event(_intern_event_fields(data)))
+        return events
+
+    def wait_for_task(
+        self,
+        project_id: int,
+        task_id: int,
+        *,
+        initial: float = 0.25,
+        max_interval: float = 5.0,
+        timeout: float = 3600,
+    ) -> "Task":
+        """Wait for a task to finish, and return it.
 
+        The task is polled with an exponentially growing interval, from
+        `initial` up to `max_interval` seconds. `TimeoutError` is raised
+        if the task hasn't finished after `timeout` seconds.
+        """
+        url = self._urls.project_task(project_id, task_id)
+        deadline = time.monotonic() + timeout
+        interval = initial
+        while True:
+            response = self._request("GET", url, expect=_OK)
+            task = _make_task(self._json(response), client=self)
+            if task.status in _TASK_FINISHED:
+                return task
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"Task {task_id} of project {project_id} is still {task.status}"
+                )
+            time.sleep(min(interval, remaining))
+            interval = min(max_interval, interval * 1.7)
 
-@dataclass
+
+@dataclass(slots=True)
 class Integration:
     """A project integration"""
 
@@ -88,25 +832,37 @@ class Integration:
 
     client: SemaphoreUIClient
 
-    def save(self) -> None:
-        response = self.client.http.put(
-            f"{self.client.api_endpoint}/project/{self.project_id}/integrations/{self.id}",
-            json={
-                "project_id": self.project_id,
-                "name": self.name,
-                "template_id": self.template_id,
-            },
+    # The body of the last successful `save`, to skip repeating it.
+    _saved: typing.Optional[typing.Dict[str, typing.Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def save(self, force: bool = False) -> None:
+        """Save the integration, unless unchanged since its last save.
+
+        Pass `force=True` to send it regardless.
+        """
+        body = {
+            "project_id": self.project_id,
+            "name": self.name,
+            "template_id": self.template_id,
+        }
+        _put_if_changed(
+            self,
+            self.client._urls.project_integration(self.project_id, self.id),
+            body,
+            force,
         )
-        assert response.status_code == 204
 
     def delete(self) -> None:
-        response = self.client.http.delete(
-            f"{self.client.api_endpoint}/project/{self.project_id}/integrations/{self.id}"
+        self.client._request(
+            "DELETE",
+            self.client._urls.project_integration(self.project_id, self.id),
+            expect=_NO_CONTENT,
         )
-        assert response.status_code == 204
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Token:
     """An authorization token."""
 
@@ -118,13 +874,19 @@ class Token:
     client: SemaphoreUIClient
 
     def delete(self) -> None:
-        response = self.client.http.delete(
-            f"{self.client.api_endpoint}/user/tokens/{self.id}"
+        self.client._request(
+            "DELETE",
+            self.client._urls.token(self.id),
+            # 404 if token was already expired
+            expect=(204, 404),
         )
-        assert response.status_code in (204, 404)  # 404 if token was already expired
+        if self.client._token_cache is not None:
+            self.client._token_cache = [
+                token for token in self.client._token_cache if token.id != self.id
+            ]
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     """A Semaphore UI project."""
 
@@ -138,49 +900,68 @@ class Project:
 
     client: SemaphoreUIClient
 
+    # Built on first use of `url`.
+    _url: str = field(default="", init=False, repr=False, compare=False)
+    # The body of the last successful `save`, to skip repeating it.
+    _saved: typing.Optional[typing.Dict[str, typing.Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     @property
     def url(self) -> str:
-        return f"{self.client.api_endpoint}/project/{self.id}"
+        if not self._url:
+            self._url = self.client._urls.project(self.id)
+        return self._url
 
     def delete(self) -> None:
-        response = self.client.http.delete(
-            f"{self.client.api_endpoint}/project/{self.id}"
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
+        self.client._project_cache.pop(self.id, None)
+
+    def refresh(self) -> None:
+        """Reload this project from the server."""
+        fresh = _make_project(
+            self.client._get_json_revalidated(self.url, fresh=True),
+            client=self.client,
         )
-        assert response.status_code == 204
+        for f in dataclasses.fields(self):
+            if f.init:
+                setattr(self, f.name, getattr(fresh, f.name))
+        self._saved = None
+        self.client._project_cache[self.id] = self
 
-    def save(self) -> None:
-        response = self.client.http.put(
-            f"{self.client.api_endpoint}/project/{self.id}",
-            json={
-                "name": self.name,
-                "alert": self.alert,
-                "alert_chat": self.alert_chat,
-                "max_parallel_tasks": self.max_parallel_tasks,
-                "type": self.type,
-            },
-        )
-        assert response.status_code == 204
+    def save(self, force: bool = False) -> None:
+        """Save the project, unless unchanged since its last save.
+
+        Pass `force=True` to send it regardless.
+        """
+        body = {
+            "name": self.name,
+            "alert": self.alert,
+            "alert_chat": self.alert_chat,
+            "max_parallel_tasks": self.max_parallel_tasks,
+            "type": self.type,
+        }
+        _put_if_changed(self, self.url, body, force)
 
     def backup(self) -> "ProjectBackup":
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/backup"
+        return _make_project_backup(
+            self.client._get_json_revalidated(self.client._urls.project_backup(self.id))
         )
-        assert response.status_code == 200
-        return ProjectBackup(**response.json())
 
     def role(self) -> "Permissions":
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/role"
+        data = self.client._get_json_revalidated(
+            self.client._urls.project_role(self.id)
         )
-        assert response.status_code == 200
-        return Permissions(**response.json())
+        data["role"] = sys.intern(data["role"])
+        return _make_permissions(data)
 
     def events(self) -> typing.List["Event"]:
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/events"
-        )
-        assert response.status_code == 200
-        return [Event(**data) for data in response.json()]
+        return [
+            _make_event(_intern_event_fields(data))
+            for data in self.client._get_json_revalidated(
+                self.client._urls.project_events(self.id)
+            )
+        ]
 
     def users(
         self, sort: typing.Optional[str] = None, order: typing.Optional[str] = None
@@ -190,34 +971,65 @@ class Project:
             params["sort"] = sort
         if order is not None:
             params["order"] = order
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/users", params=params
+        return self.client._get_list(
+            self.client._urls.project_users(self.id),
+            _make_project_user,
+            params,
+            project_id=self.id,
         )
-        assert response.status_code == 200
-        return [
-            ProjectUser(**data, client=self.client, project_id=self.id)
-            for data in response.json()
-        ]
 
     def add_user(self, user: "ProjectUser") -> None:
-        response = self.client.http.post(
-            f"{self.client.api_endpoint}/project/{self.id}/users",
-            json=user.to_json(),  # type: ignore
+        self.client._request(
+            "POST",
+            self.client._urls.project_users(self.id),
+            json=user.to_dict(),
+            expect=_NO_CONTENT,
         )
-        assert response.status_code == 204
+
+    def fetch_all(self) -> typing.Dict[str, typing.List[typing.Any]]:
+        """Fetch the project's resources concurrently, keyed by kind."""
+        calls: typing.Dict[str, typing.Callable[[], typing.List[typing.Any]]] = {
+            "templates": self.templates,
+            "keys": self.keys,
+            "repositories": self.repositories,
+            "environments": self.environments,
+            "views": self.views,
+            "inventories": self.inventories,
+            "events": self.events,
+        }
+        return dict(zip(calls, self.client.bulk(calls.values())))
+
+    def add_users(self, users: typing.Iterable["ProjectUser"]) -> None:
+        self.client.bulk_add_project_users(self.id, users)
 
     def remove_user(self, user_id: int) -> None:
-        response = self.client.http.delete(
-            f"{self.client.api_endpoint}/project/{self.id}/users/{user_id}"
+        self.client._request(
+            "DELETE",
+            self.client._urls.project_user(self.id, user_id),
+            expect=_NO_CONTENT,
         )
-        assert response.status_code == 204
 
     def update_user(self, user: "ProjectUser") -> None:
-        response = self.client.http.put(
-            f"{self.client.api_endpoint}/project/{self.id}/users/{user.id}",
-            json=user.to_json(),  # type: ignore
+        self.client._request(
+            "PUT",
+            self.client._urls.project_user(self.id, user.id),
+            json=user.to_dict(),
+            expect=_NO_CONTENT,
         )
-        assert response.status_code == 204
+
+    def _resolve_by_name(
+        self, listing: typing.Callable[[], typing.List["_N"]], name: str
+    ) -> "_N":
+        """Find a just-created object by name, for creates with no body.
+
+        The create has just changed the listing, so its ETag can't match
+        and this is always a full download; it is only a fallback for
+        servers that don't return the created object.
+        """
+        for item in listing():
+            if item.name == name:
+                return item
+        raise LookupError(f"Created object {name!r} is not listed")
 
     def keys(
         self,
@@ -232,11 +1044,9 @@ class Project:
             params["sort"] = sort
         if order is not None:
             params["order"] = order
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/keys", params=params
+        return self.client._get_list(
+            self.client._urls.project_keys(self.id), _make_key, params, revalidate=True
         )
-        assert response.status_code == 200
-        return [Key(**data, client=self.client) for data in response.json()]
 
     def create_key(
         self,
@@ -286,29 +1096,31 @@ class Project:
                 },
                 "ssh": {"login": "", "passphrase": "", "private_key": ""},
             }
-        response = self.client.http.post(
-            f"{self.client.api_endpoint}/project/{self.id}/keys", json=json_data
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_keys(self.id),
+            json=json_data,
+            expect=_CREATED | _NO_CONTENT,
         )
-        assert response.status_code == 204
 
-        try:
-            return Key(**response.json(), client=self.client)
-        except ValueError:
-            # Sporadically, the response is an empty string. Get the actual key from the API
-            return [key for key in self.keys() if key.name == name][0]
+        if response.content:
+            return _make_key(self.client._json(response), client=self.client)
+        # Sporadically, the response is an empty string. Get the actual key from the API
+        return self._resolve_by_name(self.keys, name)
 
     def repositories(self) -> typing.List["Repository"]:
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/repositories"
+        return self.client._get_list(
+            self.client._urls.project_repositories(self.id),
+            _make_repository,
+            revalidate=True,
         )
-        assert response.status_code == 200
-        return [Repository(**data, client=self.client) for data in response.json()]
 
     def create_repository(
         self, name: str, git_url: str, git_branch: str, ssh_key_id: int
     ) -> "Repository":
-        response = self.client.http.post(
-            f"{self.client.api_endpoint}/project/{self.id}/repositories",
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_repositories(self.id),
             json={
                 "name": name,
                 "project_id": self.id,
@@ -316,19 +1128,18 @@ class Project:
                 "git_branch": git_branch,
                 "ssh_key_id": ssh_key_id,
             },
+            expect=_CREATED | _NO_CONTENT,
         )
-        assert response.status_code == 204
-        try:
-            return Repository(**response.json(), client=self.client)
-        except ValueError:
-            return [repo for repo in self.repositories() if repo.name == name][0]
+        if response.content:
+            return _make_repository(self.client._json(response), client=self.client)
+        return self._resolve_by_name(self.repositories, name)
 
     def environments(self) -> typing.List["Environment"]:
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/environment"
+        return self.client._get_list(
+            self.client._urls.project_environments(self.id),
+            _make_environment,
+            revalidate=True,
         )
-        assert response.status_code == 200
-        return [Environment(**data, client=self.client) for data in response.json()]
 
     def create_environment(
         self,
@@ -338,8 +1149,9 @@ class Project:
         env: str,
         secrets: typing.List[typing.Dict[typing.Any, typing.Any]],
     ) -> "Environment":
-        response = self.client.http.post(
-            f"{self.url}/environment",
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_environments(self.id),
             json={
                 "name": name,
                 "project_id": self.id,
@@ -348,30 +1160,32 @@ class Project:
                 "env": env,
                 "secrets": secrets,
             },
+            expect=_CREATED | _NO_CONTENT,
         )
-        assert response.status_code == 204
-        try:
-            return Environment(**response.json(), client=self.client)
-        except ValueError:
-            return [env for env in self.environments() if env.name == name][0]
+        if response.content:
+            return _make_environment(self.client._json(response), client=self.client)
+        return self._resolve_by_name(self.environments, name)
 
     def views(self) -> typing.List["View"]:
-        response = self.client.http.get(f"{self.url}/views")
-        assert response.status_code == 200
-        return [View(**data, client=self.client) for data in response.json()]
+        return self.client._get_list(
+            self.client._urls.project_views(self.id), _make_view, revalidate=True
+        )
 
     def create_view(self, title: str, position: int) -> "View":
-        response = self.client.http.post(
-            f"{self.url}/views",
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_views(self.id),
             json={"position": position, "title": title, "project_id": self.id},
+            expect=_CREATED,
         )
-        assert response.status_code == 201
-        return View(**response.json(), client=self.client)
+        return _make_view(self.client._json(response), client=self.client)
 
     def inventories(self) -> typing.List["Inventory"]:
-        response = self.client.http.get(f"{self.url}/inventory")
-        assert response.status_code == 200
-        return [Inventory(**data, client=self.client) for data in response.json()]
+        return self.client._get_list(
+            self.client._urls.project_inventories(self.id),
+            _make_inventory,
+            revalidate=True,
+        )
 
     def create_inventory(
         self,
@@ -382,8 +1196,9 @@ class Project:
         type: str,
         repository_id: int,
     ) -> "Inventory":
-        response = self.client.http.post(
-            f"{self.url}/inventory",
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_inventories(self.id),
             json={
                 "id": 0,
                 "name": name,
@@ -394,21 +1209,16 @@ class Project:
                 "type": type,
                 "repository_id": repository_id,
             },
+            expect=_CREATED,
         )
-        assert response.status_code == 201
-        return Inventory(**response.json(), client=self.client)
+        return _make_inventory(self.client._json(response), client=self.client)
 
     def templates(self) -> typing.List["Template"]:
-        response = self.client.http.get(f"{self.url}/templates")
-        assert response.status_code == 200
-        templates: typing.List["Template"] = []
-        for template in response.json():
-            if template["last_task"] is not None:
-                template["last_task"] = Task(
-                    **template["last_task"], client=self.client
-                )
-            templates.append(Template(**template, client=self.client))
-        return templates
+        return self.client._get_list(
+            self.client._urls.project_templates(self.id),
+            _make_template,
+            revalidate=True,
+        )
 
     def create_template(
         self,
@@ -432,8 +1242,9 @@ class Project:
         autorun: bool,
         build_template_id: typing.Optional[int] = None,
     ) -> "Template":
-        response = self.client.http.post(
-            f"{self.url}/templates",
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_templates(self.id),
             json={
                 "id": 0,
                 "project_id": self.id,
@@ -457,24 +1268,23 @@ class Project:
                 "build_template_id": build_template_id,
                 "autorun": autorun,
             },
+            expect=_CREATED,
         )
-        assert response.status_code == 201, (
-            f"Expected response code 201, got {response.status_code}"
-        )
-        return Template(**response.json(), client=self.client)
+        return _make_template(self.client._json(response), client=self.client)
 
     def schedules(self) -> typing.List["Schedule"]:
-        response = self.client.http.get(f"{self.url}/schedules")
-        assert response.status_code == 200
-        return [
-            Schedule(**schedule, client=self.client) for schedule in response.json()
-        ]
+        return self.client._get_list(
+            self.client._urls.project_schedules(self.id),
+            _make_schedule,
+            revalidate=True,
+        )
 
     def create_schedule(
         self, template_id: int, name: str, cron_format: str, active: bool = True
     ) -> "Schedule":
-        response = self.client.http.post(
-            f"{self.url}/schedules",
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_schedules(self.id),
             json={
                 "id": 0,
                 "project_id": self.id,
@@ -483,49 +1293,86 @@ class Project:
                 "cron_format": cron_format,
                 "active": active,
             },
+            expect=_CREATED,
         )
-        assert response.status_code == 201
-        return Schedule(**response.json(), client=self.client)
+        return _make_schedule(self.client._json(response), client=self.client)
 
-    def tasks(self) -> typing.List["Task"]:
-        response = self.client.http.get(f"{self.url}/tasks")
-        assert response.status_code == 200
-        return [Task(**task, client=self.client) for task in response.json()]
+    @typing.overload
+    def tasks(self, fields: None = None) -> typing.List["Task"]: ...
 
-    def get_task(self, task_id: int) -> "Task":
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/tasks/{task_id}"
+    @typing.overload
+    def tasks(
+        self, fields: typing.Collection[str]
+    ) -> typing.List[typing.Dict[str, typing.Any]]: ...
+
+    def tasks(
+        self, fields: typing.Optional[typing.Collection[str]] = None
+    ) -> typing.Union[typing.List["Task"], typing.List[typing.Dict[str, typing.Any]]]:
+        """Get the project's tasks.
+
+        When `fields` is given, only those keys are kept from each task,
+        and plain dicts are returned instead of `Task` objects. This is
+        much cheaper for large task histories when only a few fields
+        (e.g. id and status) are needed.
+        """
+        response = self.client._request(
+            "GET", self.client._urls.project_tasks(self.id), expect=_OK
         )
-        assert response.status_code == 200
-        return Task(**response.json(), client=self.client)
+        if fields is not None:
+            return [
+                {name: task[name] for name in fields if name in task}
+                for task in self.client._json(response)
+            ]
+        return list(
+            map(
+                functools.partial(_make_task, client=self.client),
+                self.client._json(response),
+            )
+        )
+
+    def tasks_iter(self) -> typing.Iterator["Task"]:
+        """Yield the project's tasks as the listing is downloaded.
+
+        Task histories grow without bound, so the listing is streamed and
+        decoded item by item rather than held in memory as a whole.
+        """
+        with self.client._request(
+            "GET", self.client._urls.project_tasks(self.id), stream=True, expect=_OK
+        ) as response:
+            for data in _iter_json_array(response.iter_content(chunk_size=65536)):
+                yield _make_task(data, client=self.client)
+
+    def get_task(self, task_id: int) -> "Task":
+        return self.client.get_task(self.id, task_id)
 
     def integrations(self) -> typing.List["Integration"]:
-        response = self.client.http.get(
-            f"{self.client.api_endpoint}/project/{self.id}/integrations"
+        return self.client._get_list(
+            self.client._urls.project_integrations(self.id),
+            _make_integration,
+            revalidate=True,
         )
-        assert response.status_code == 200
-        return [Integration(**data, client=self.client) for data in response.json()]
 
     def create_integration(self, name: str, template_id: int) -> "Integration":
-        response = self.client.http.post(
-            f"{self.client.api_endpoint}/project/{self.id}integrations",
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_integrations(self.id),
             json={"project_id": self.id, "name": name, "template_id": template_id},
+            expect=_CREATED,
         )
-        assert response.status_code == 200
-        return Integration(**response.json(), client=self.client)
+        return _make_integration(self.client._json(response), client=self.client)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Permissions:
     role: str
     permissions: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ProjectBackup: ...
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Event:
     project_id: int
     user_id: int
@@ -534,8 +1381,7 @@ class Event:
     description: str
 
 
-@dataclass_json
-@dataclass
+@dataclass(slots=True)
 class ProjectUser:
     id: int
     name: str
@@ -548,23 +1394,30 @@ class ProjectUser:
 
     @property
     def url(self) -> str:
-        return f"{self.client.api_endpoint}/project/{self.project_id}/users/{self.id}"
+        return self.client._urls.project_user(self.project_id, self.id)
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """The user as the api expects it when adding or updating."""
+        return {"user_id": self.id, "role": self.role}
+
+    def to_json(self) -> bytes:
+        return _dumps(self.to_dict())
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class KeySsh:
     login: str
     passphrase: str
     private_key: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class KeyLoginPassword:
     login: str
     password: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Key:
     id: int
     name: str
@@ -578,16 +1431,22 @@ class Key:
 
     client: SemaphoreUIClient
 
+    def __post_init__(self) -> None:
+        # The api sends the credentials as plain objects.
+        if isinstance(self.login_password, dict):
+            self.login_password = _make_key_login_password(self.login_password)
+        if isinstance(self.ssh, dict):
+            self.ssh = _make_key_ssh(self.ssh)
+
     @property
     def url(self) -> str:
-        return f"{self.client.api_endpoint}/project/{self.project_id}/keys/{self.id}"
+        return self.client._urls.project_key(self.project_id, self.id)
 
     def delete(self) -> None:
-        response = self.client.http.delete(self.url)
-        assert response.status_code == 204
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
 
 
-@dataclass
+@dataclass(slots=True)
 class Repository:
     id: int
     name: str
@@ -600,21 +1459,21 @@ class Repository:
 
     @property
     def url(self) -> str:
-        return f"{self.client.api_endpoint}/project/{self.project_id}/repositories/{self.id}"
+        return self.client._urls.project_repository(self.project_id, self.id)
 
     def delete(self) -> None:
-        response = self.client.http.delete(self.url)
-        assert response.status_code == 204
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
+        self.client._repository_cache.pop((self.project_id, self.id), None)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Secret:
     id: int
     name: str
     type: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Environment:
     id: int
     name: str
@@ -622,20 +1481,29 @@ class Environment:
     password: str
     json: str
     env: str
-    secrets: typing.List["Secret"]
+    secrets: typing.List[Secret]
 
     client: SemaphoreUIClient
 
+    def __post_init__(self) -> None:
+        # The api sends the secrets as plain objects, or null for none.
+        if self.secrets is None:
+            self.secrets = []
+        else:
+            self.secrets = [
+                _make_secret(secret) if isinstance(secret, dict) else secret
+                for secret in self.secrets
+            ]
+
     @property
     def url(self) -> str:
-        return f"{self.client.api_endpoint}/project/{self.project_id}/environment/{self.id}"
+        return self.client._urls.project_environment(self.project_id, self.id)
 
     def delete(self) -> None:
-        response = self.client.http.delete(self.url)
-        assert response.status_code == 204
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
 
 
-@dataclass
+@dataclass(slots=True)
 class View:
     id: int
     title: str
@@ -646,14 +1514,13 @@ class View:
 
     @property
     def url(self) -> str:
-        return f"{self.client.api_endpoint}/project/{self.project_id}/views/{self.id}"
+        return self.client._urls.project_view(self.project_id, self.id)
 
     def delete(self) -> None:
-        response = self.client.http.delete(self.url)
-        assert response.status_code == 204
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
 
 
-@dataclass
+@dataclass(slots=True)
 class Inventory:
     id: int
     name: str
@@ -669,18 +1536,17 @@ class Inventory:
     client: SemaphoreUIClient
 
     def url(self) -> str:
-        return (
-            f"{self.client.api_endpoint}/project/{self.project_id}/inventory/{self.id}"
-        )
+        return self.client._urls.project_inventory(self.project_id, self.id)
 
     def delete(self) -> None:
-        response = self.client.http.delete(
-            f"{self.client.api_endpoint}/project/{self.project_id}/inventory/{self.id}"
+        self.client._request(
+            "DELETE",
+            self.client._urls.project_inventory(self.project_id, self.id),
+            expect=_NO_CONTENT,
         )
-        assert response.status_code == 204
 
 
-@dataclass
+@dataclass(slots=True)
 class Template:
     id: int
     project_id: int
@@ -706,11 +1572,14 @@ class Template:
 
     client: SemaphoreUIClient
 
+    def __post_init__(self) -> None:
+        # The api sends the last task as a plain object.
+        if isinstance(self.last_task, dict):
+            self.last_task = _make_task(self.last_task, client=self.client)
+
     @property
     def url(self) -> str:
-        return (
-            f"{self.client.api_endpoint}/project/{self.project_id}/templates/{self.id}"
-        )
+        return self.client._urls.project_template(self.project_id, self.id)
 
     def run(
         self,
@@ -721,13 +1590,14 @@ class Template:
         limit: str = "",
         environment: str = "",
     ) -> "Task":
-        project = self.client.get_project(self.project_id)
-        repo = [
-            repo for repo in project.repositories() if repo.id == self.repository_id
-        ][0]
-        git_branch = repo.git_branch
-        response = self.client.http.post(
-            f"{self.client.api_endpoint}/project/{self.project_id}/tasks",
+        # The branch may have changed elsewhere, so skip the cache ttl.
+        git_branch = self.client._get_json_revalidated(
+            self.client._urls.project_repository(self.project_id, self.repository_id),
+            fresh=True,
+        )["git_branch"]
+        response = self.client._request(
+            "POST",
+            self.client._urls.project_tasks(self.project_id),
             json={
                 "template_id": self.id,
                 "debug": debug,
@@ -739,15 +1609,13 @@ class Template:
                 "git_branch": git_branch,
                 "message": message,
             },
+            expect=_CREATED,
         )
-        assert response.status_code == 201
         # The response is not quite a full task, so re-fetch it.
-        project = self.client.get_project(self.project_id)
-        return project.get_task(response.json()["id"])
+        return self.client.get_task(self.project_id, self.client._json(response)["id"])
 
     def delete(self) -> None:
-        response = self.client.http.delete(self.url)
-        assert response.status_code == 204
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
 
     def last_tasks(self, limit: typing.Optional[int] = None) -> typing.List["Task"]:
         """Get the last tasks.
@@ -759,15 +1627,14 @@ class Template:
         params = {}
         if limit is not None:
             params["limit"] = limit
-        response = self.client.http.get(
-            f"{self.url}/tasks/last",
-            params=params,
+        return self.client._get_list(
+            self.client._urls.project_template_last_tasks(self.project_id, self.id),
+            _make_task,
+            params,
         )
-        assert response.status_code == 200
-        return [Task(**task, client=self.client) for task in response.json()]
 
 
-@dataclass
+@dataclass(slots=True)
 class Schedule:
     id: int
     cron_format: str
@@ -778,33 +1645,35 @@ class Schedule:
     active: bool
 
     client: SemaphoreUIClient
+    # The body of the last successful `save`, to skip repeating it.
+    _saved: typing.Optional[typing.Dict[str, typing.Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
     def url(self) -> str:
-        return (
-            f"{self.client.api_endpoint}/project/{self.project_id}/schedules/{self.id}"
-        )
+        return self.client._urls.project_schedule(self.project_id, self.id)
 
-    def save(self) -> None:
-        response = self.client.http.post(
-            self.url,
-            json={
-                "id": self.id,
-                "project_id": self.project_id,
-                "template_id": self.template_id,
-                "name": self.name,
-                "cron_format": self.cron_format,
-                "active": self.active,
-            },
-        )
-        assert response.status_code == 201
+    def save(self, force: bool = False) -> None:
+        """Save the schedule, unless unchanged since its last save.
+
+        Pass `force=True` to send it regardless.
+        """
+        body = {
+            "id": self.id,
+            "project_id": self.project_id,
+            "template_id": self.template_id,
+            "name": self.name,
+            "cron_format": self.cron_format,
+            "active": self.active,
+        }
+        _put_if_changed(self, self.url, body, force)
 
     def delete(self) -> None:
-        response = self.client.http.delete(self.url)
-        assert response.status_code == 204
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     arguments: typing.Optional[str]
     build_task_id: typing.Optional[int]
@@ -845,17 +1714,246 @@ class Task:
 
     @property
     def url(self) -> str:
-        return f"{self.client.api_endpoint}/project/{self.project_id}/tasks/{self.id}"
+        return self.client._urls.project_task(self.project_id, self.id)
 
     def stop(self, force: bool = False) -> None:
-        response = self.client.http.post(f"{self.url}/stop", json={"force": force})
-        assert response.status_code == 204
+        self.client._request(
+            "POST",
+            self.client._urls.project_task_stop(self.project_id, self.id),
+            json={"force": force},
+            expect=_NO_CONTENT,
+        )
 
     def delete(self) -> None:
-        response = self.client.http.delete(self.url)
-        assert response.status_code == 204
+        self.client._request("DELETE", self.url, expect=_NO_CONTENT)
 
     def output(self) -> typing.List[str]:
-        response = self.client.http.get(f"{self.url}/output")
-        assert response.status_code == 200
-        return [data["output"] for data in response.json()]
+        response = self.client._request(
+            "GET",
+            self.client._urls.project_task_output(self.project_id, self.id),
+            expect=_OK,
+        )
+        return [data["output"] for data in self.client._json(response)]
+
+    def output_text(self) -> str:
+        """The task output as a single string, one line per output record.
+
+        The output is streamed, so neither the raw response body nor the
+        decoded record dicts are buffered; only the lines themselves are.
+        """
+        return "\n".join(self.iter_output())
+
+    def iter_output(self) -> typing.Iterator[str]:
+        """Yield the output lines of the task as they are downloaded.
+
+        Unlike `output`, the response body is never held in memory as a
+        whole, so this suits long task logs.
+        """
+        with self.client._request(
+            "GET",
+            self.client._urls.project_task_output(self.project_id, self.id),
+            stream=True,
+            expect=_OK,
+        ) as response:
+            for data in _iter_json_array(response.iter_content(chunk_size=65536)):
+                yield data["output"]
+
+
+def _put_if_changed(
+    obj: _Saveable, url: str, body: typing.Dict[str, typing.Any], force: bool
+) -> None:
+    """PUT `body` to `url`, unless it is what `obj` last saved.
+
+    The comparison is with the last save through `obj` only, so changes
+    made elsewhere since aren't noticed; `force` sends the body anyway.
+    """
+    if not force and body == obj._saved:
+        return
+    obj.client._request("PUT", url, json=body, expect=_NO_CONTENT)
+    obj._saved = body
+
+
+def _iter_json_array(
+    chunks: typing.Iterable[bytes],
+) -> typing.Iterator[typing.Any]:
+    """Decode the items of a json array from a stream of byte chunks.
+
+    Raises `ValueError` if the body isn't a single json array, including
+    when the stream ends before the array is closed.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    # What may come next: the opening bracket, an item (or the closing
+    # bracket right after the opening one), a separator after an item,
+    # and nothing once the array is closed.
+    expect = "open"
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer = buffer[position:] + text.decode(chunk or b"", final=final)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if expect == "open":
+                if char != "[":
+                    raise ValueError("Expected a json array")
+                expect = "first"
+                position += 1
+            elif expect == "closed":
+                raise ValueError("Unexpected data after the json array")
+            elif char == "]" and expect != "item":
+                expect = "closed"
+                position += 1
+            elif expect == "separator":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' at {char!r}")
+                expect = "item"
+                position += 1
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    # The item is incomplete, wait for the next chunk.
+                    break
+                if end == len(buffer) and not final:
+                    # A number at the end of the chunk may continue in
+                    # the next one.
+                    break
+                position = end
+                expect = "separator"
+                yield item
+    if expect != "closed":
+        raise ValueError("The json array ended early")
+
+
+def _intern_event_fields(
+    data: typing.Dict[str, typing.Any],
+) -> typing.Dict[str, typing.Any]:
+    """Intern the repetitive strings of an event in place.
+
+    Event histories repeat a handful of object types and short
+    descriptions many times over, so interning collapses them to a
+    single string object each.
+    """
+    if isinstance(data.get("object_type"), str):
+        data["object_type"] = sys.intern(data["object_type"])
+    description = data.get("description")
+    if isinstance(description, str) and len(description) < 64:
+        data["description"] = sys.intern(description)
+    return data
+
+
+def _tuple_getter(
+    names: typing.Sequence[str],
+) -> typing.Callable[[typing.Dict[str, typing.Any]], typing.Tuple[typing.Any, ...]]:
+    """An `operator.itemgetter` that always returns a tuple."""
+    if len(names) == 1:
+        name = names[0]
+        return lambda data: (data[name],)
+    if not names:
+        return lambda data: ()
+    return operator.itemgetter(*names)
+
+
+def _constructor(cls: typing.Type[_D]) -> typing.Callable[..., _D]:
+    """Build a constructor for `cls` from an api response dict.
+
+    Field names are resolved once, and each row is passed to `cls`
+    positionally. Keys the dataclass doesn't declare are ignored, so
+    new fields in the api don't break the client.
+    """
+    plan = tuple((f.name, f.default) for f in dataclasses.fields(cls) if f.init)
+    builders: typing.Dict[
+        typing.Tuple[str, ...],
+        typing.Callable[
+            [typing.Dict[str, typing.Any], typing.Dict[str, typing.Any]], _D
+        ],
+    ] = {}
+
+    def generic(
+        data: typing.Dict[str, typing.Any], extra: typing.Dict[str, typing.Any]
+    ) -> _D:
+        return cls(
+            *[
+                extra[name]
+                if name in extra
+                else data[name]
+                if default is dataclasses.MISSING
+                else data.get(name, default)
+                for name, default in plan
+            ]
+        )
+
+    def specialize(
+        names: typing.Tuple[str, ...],
+    ) -> typing.Callable[
+        [typing.Dict[str, typing.Any], typing.Dict[str, typing.Any]], _D
+    ]:
+        # The common layout is required api fields, then the fields passed
+        # in `extra` (e.g. the client), then optional api fields. Those
+        # rows are built with an itemgetter over the required fields,
+        # which is much faster than looking fields up one at a time.
+        layout = [
+            0
+            if name not in names and default is dataclasses.MISSING
+            else 1
+            if name in names
+            else 2
+            for name, default in plan
+        ]
+        if layout != sorted(layout):
+            return generic
+        required = [name for (name, _), part in zip(plan, layout) if part == 0]
+        optional = [(name, d) for (name, d), part in zip(plan, layout) if part == 2]
+        passed = [name for (name, _), part in zip(plan, layout) if part == 1]
+        get = _tuple_getter(required)
+        take = _tuple_getter(passed)
+        if not optional:
+            return lambda data, extra: cls(*get(data), *take(extra))
+
+        def build(
+            data: typing.Dict[str, typing.Any], extra: typing.Dict[str, typing.Any]
+        ) -> _D:
+            return cls(
+                *get(data),
+                *take(extra),
+                *[data.get(name, default) for name, default in optional],
+            )
+
+        return build
+
+    def make(data: typing.Dict[str, typing.Any], **extra: typing.Any) -> _D:
+        names = tuple(extra)
+        build = builders.get(names)
+        if build is None:
+            build = builders[names] = specialize(names)
+        return build(data, extra)
+
+    return make
+
+
+_make_integration = _constructor(Integration)
+_make_token = _constructor(Token)
+_make_project = _constructor(Project)
+_make_event = _constructor(Event)
+_make_permissions = _constructor(Permissions)
+_make_project_backup = _constructor(ProjectBackup)
+_make_project_user = _constructor(ProjectUser)
+_make_key = _constructor(Key)
+_make_key_login_password = _constructor(KeyLoginPassword)
+_make_key_ssh = _constructor(KeySsh)
+_make_secret = _constructor(Secret)
+_make_repository = _constructor(Repository)
+_make_environment = _constructor(Environment)
+_make_view = _constructor(View)
+_make_inventory = _constructor(Inventory)
+_make_template = _constructor(Template)
+_make_schedule = _constructor(Schedule)
+_make_task = _constructor(Task)
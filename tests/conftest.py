@@ -0,0 +1,88 @@
+import json
+import typing
+import urllib.parse
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from semaphoreui_client import Client
+
+HOST = "http://semaphore.test"
+
+
+class FakeApi(BaseAdapter):
+    """A requests adapter answering from canned json documents.
+
+    GET responses carry an ETag derived from their body and honour
+    If-None-Match, like the Semaphore server does.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.documents: typing.Dict[typing.Tuple[str, str], typing.Any] = {}
+        self.statuses: typing.Dict[typing.Tuple[str, str], int] = {}
+        self.sent: typing.List[requests.PreparedRequest] = []
+
+    def route(
+        self, method: str, path: str, document: typing.Any, status: int = 200
+    ) -> None:
+        self.documents[(method, f"/api{path}")] = document
+        self.statuses[(method, f"/api{path}")] = status
+
+    def calls(self, method: typing.Optional[str] = None) -> typing.List[str]:
+        """The paths requested so far, optionally only for `method`."""
+        return [
+            urllib.parse.urlsplit(request.url or "").path
+            for request in self.sent
+            if method is None or request.method == method
+        ]
+
+    def send(
+        self, request: requests.PreparedRequest, **kwargs: typing.Any
+    ) -> requests.Response:
+        self.sent.append(request)
+        path = urllib.parse.urlsplit(request.url or "").path
+        key = (request.method or "", path)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url or ""
+        response._content_consumed = True  # type: ignore[attr-defined]
+        if key not in self.documents:
+            response.status_code = 404
+            response._content = b""
+            return response
+        document = self.documents[key]
+        body = b"" if document is None else json.dumps(document).encode()
+        response.status_code = self.statuses[key]
+        response._content = body
+        if request.method == "GET":
+            etag = f'"{hash(body)}"'
+            response.headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                response.status_code = 304
+                response._content = b""
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def api() -> FakeApi:
+    return FakeApi()
+
+
+@pytest.fixture
+def make_client(api: FakeApi) -> typing.Callable[..., Client]:
+    def make(**kwargs: typing.Any) -> Client:
+        client = Client(HOST, **kwargs)
+        client.http.mount("http://", api)
+        return client
+
+    return make
+
+
+@pytest.fixture
+def client(make_client: typing.Callable[..., Client]) -> Client:
+    return make_client()
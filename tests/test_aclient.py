@@ -0,0 +1,37 @@
+import asyncio
+import ssl
+
+import pytest
+
+from semaphoreui_client import Client
+from semaphoreui_client.aclient import AsyncSemaphoreUIClient
+
+from .conftest import HOST
+
+
+def test_from_client_uses_the_session_settings(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv("REQUESTS_CA_BUNDLE", raising=False)
+    monkeypatch.delenv("CURL_CA_BUNDLE", raising=False)
+    client = Client(HOST)
+    client.http.verify = False
+    client.http.headers["X-Custom"] = "kept"
+    client.login_with_token("secret")
+
+    aclient = AsyncSemaphoreUIClient.from_client(client)
+    try:
+        assert aclient.client is client
+        assert aclient.http.headers["X-Custom"] == "kept"
+        assert aclient.http.headers["Authorization"] == "Bearer secret"
+        pool = aclient.http._transport._pool  # type: ignore[attr-defined]
+        assert pool._ssl_context.verify_mode == ssl.CERT_NONE
+    finally:
+        asyncio.run(aclient.aclose())
+    # The client was passed in, so it stays open.
+    assert client.http.adapters
+
+
+def test_host_or_client_is_required() -> None:
+    with pytest.raises(TypeError):
+        AsyncSemaphoreUIClient()
@@ -0,0 +1,72 @@
+import typing
+
+from semaphoreui_client import Client
+
+from .conftest import FakeApi
+
+PROJECT = {
+    "id": 1,
+    "name": "p",
+    "created": "",
+    "alert": False,
+    "alert_chat": "",
+    "max_parallel_tasks": 0,
+    "type": "",
+}
+
+
+def token(id: str) -> typing.Dict[str, typing.Any]:
+    return {"id": id, "created": "", "expired": False, "user_id": 1}
+
+
+def test_relogin_forgets_the_previous_users_tokens(
+    api: FakeApi, client: Client
+) -> None:
+    api.route("POST", "/auth/login", None, 204)
+    api.route("POST", "/auth/logout", None, 204)
+    api.route("GET", "/user/tokens", [token("a")])
+    client.tokens()
+
+    client.logout()
+    client.login("b", "password")
+    api.route("GET", "/user/tokens", [token("b")])
+    api.route("POST", "/user/tokens", token("b2"), 201)
+
+    assert [t.id for t in client.create_and_list_tokens()] == ["b"]
+    assert api.calls("GET")[-1] == "/api/user/tokens"
+
+
+def test_login_with_token_forgets_cached_projects(api: FakeApi, client: Client) -> None:
+    api.route("GET", "/project/1", PROJECT)
+    client.get_project(1, cached=True)
+
+    client.login_with_token("secret")
+    client.get_project(1, cached=True)
+
+    assert api.calls("GET") == ["/api/project/1", "/api/project/1"]
+    assert api.sent[-1].headers["Authorization"] == "Bearer secret"
+
+
+def test_logout_drops_the_token(api: FakeApi, client: Client) -> None:
+    api.route("POST", "/auth/logout", None, 204)
+    api.route("GET", "/auth/login", {})
+    client.login_with_token("secret")
+
+    client.logout()
+    client.whoami()
+
+    assert "Authorization" not in api.sent[-1].headers
+
+
+def test_login_with_token_expires_cached_bodies(
+    api: FakeApi, make_client: typing.Callable[..., Client]
+) -> None:
+    client = make_client(cache_ttl=60)
+    api.route("GET", "/project/1", PROJECT)
+    client.get_project(1)
+
+    client.login_with_token("secret")
+    client.get_project(1)
+
+    assert api.calls("GET") == ["/api/project/1", "/api/project/1"]
+    assert api.sent[-1].headers["Authorization"] == "Bearer secret"
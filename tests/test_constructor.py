@@ -0,0 +1,113 @@
+import dataclasses
+import typing
+from dataclasses import dataclass, field
+
+import pytest
+
+from semaphoreui_client.client import _constructor
+
+
+@dataclass
+class Required:
+    id: int
+    name: str
+
+
+@dataclass
+class Common:
+    id: int
+    name: str
+    client: object
+    note: str = ""
+    tags: typing.Optional[typing.List[str]] = None
+
+
+@dataclass
+class Interleaved:
+    id: int
+    client: object
+    name: str
+    note: str = "default"
+
+
+@dataclass
+class WithInitFalse:
+    id: int
+    client: object
+    cached: str = field(default="", init=False)
+
+
+CLIENT = object()
+
+
+def test_required_fields() -> None:
+    make = _constructor(Required)
+    assert make({"id": 1, "name": "a"}) == Required(1, "a")
+
+
+def test_single_required_field_is_a_tuple() -> None:
+    @dataclass
+    class One:
+        id: int
+
+    assert _constructor(One)({"id": 3}) == One(3)
+
+
+def test_unknown_keys_are_ignored() -> None:
+    make = _constructor(Required)
+    assert make({"id": 1, "name": "a", "new_api_field": 2}) == Required(1, "a")
+
+
+def test_missing_required_key_raises() -> None:
+    with pytest.raises(KeyError):
+        _constructor(Required)({"id": 1})
+
+
+def test_extra_fields_and_defaults() -> None:
+    make = _constructor(Common)
+    assert make({"id": 1, "name": "a"}, client=CLIENT) == Common(1, "a", CLIENT)
+    assert make(
+        {"id": 2, "name": "b", "note": "n", "tags": ["t"]}, client=CLIENT
+    ) == Common(2, "b", CLIENT, "n", ["t"])
+
+
+def test_extra_fields_override_the_data() -> None:
+    make = _constructor(Common)
+    built = make({"id": 1, "name": "a", "client": "from the api"}, client=CLIENT)
+    assert built.client is CLIENT
+
+
+def test_builders_are_cached_per_extra_keys() -> None:
+    make = _constructor(Common)
+    first = make({"id": 1, "name": "a"}, client=CLIENT)
+    second = make({"id": 1, "name": "a"}, client=CLIENT, note="passed")
+    third = make({"id": 1, "name": "a"}, client=CLIENT)
+    assert first == third == Common(1, "a", CLIENT)
+    assert second == Common(1, "a", CLIENT, "passed")
+
+
+def test_interleaved_layout_falls_back_to_the_generic_builder() -> None:
+    make = _constructor(Interleaved)
+    assert make({"id": 1, "name": "a"}, client=CLIENT) == Interleaved(1, CLIENT, "a")
+    assert make({"id": 1, "name": "a", "note": "n"}, client=CLIENT) == Interleaved(
+        1, CLIENT, "a", "n"
+    )
+
+
+def test_init_false_fields_are_skipped() -> None:
+    built = _constructor(WithInitFalse)({"id": 1, "cached": "x"}, client=CLIENT)
+    assert built == WithInitFalse(1, CLIENT)
+    assert built.cached == ""
+
+
+@pytest.mark.parametrize("cls", [Required, Common, Interleaved, WithInitFalse])
+def test_matches_keyword_construction(cls: typing.Type[typing.Any]) -> None:
+    data = {"id": 7, "name": "n", "note": "x", "tags": ["a"]}
+    init = [f.name for f in dataclasses.fields(cls) if f.init]
+    kwargs = {name: data[name] for name in init if name in data}
+    if "client" in init:
+        kwargs["client"] = CLIENT
+        built = _constructor(cls)(data, client=CLIENT)
+    else:
+        built = _constructor(cls)(data)
+    assert built == cls(**kwargs)
@@ -0,0 +1,45 @@
+from semaphoreui_client import Client
+from semaphoreui_client.client import Repository
+
+from .conftest import FakeApi
+
+PROJECT = {
+    "id": 1,
+    "name": "p",
+    "created": "",
+    "alert": False,
+    "alert_chat": "",
+    "max_parallel_tasks": 0,
+    "type": "",
+}
+REPOSITORY = {
+    "id": 5,
+    "name": "repo",
+    "project_id": 1,
+    "git_url": "git@example.com:repo.git",
+    "git_branch": "main",
+    "ssh_key_id": 2,
+}
+
+
+def create(client: Client) -> Repository:
+    return client.get_project(1).create_repository(
+        "repo", "git@example.com:repo.git", "main", 2
+    )
+
+
+def test_created_object_is_used(api: FakeApi, client: Client) -> None:
+    api.route("GET", "/project/1", PROJECT)
+    api.route("POST", "/project/1/repositories", REPOSITORY, 201)
+
+    assert create(client).id == 5
+    assert "/api/project/1/repositories" not in api.calls("GET")
+
+
+def test_empty_create_falls_back_to_the_listing(api: FakeApi, client: Client) -> None:
+    api.route("GET", "/project/1", PROJECT)
+    api.route("POST", "/project/1/repositories", None, 204)
+    api.route("GET", "/project/1/repositories", [REPOSITORY])
+
+    assert create(client).id == 5
+    assert api.calls("GET")[-1] == "/api/project/1/repositories"
@@ -0,0 +1,59 @@
+import typing
+
+from semaphoreui_client import Client
+
+from .conftest import FakeApi
+
+MakeClient = typing.Callable[..., Client]
+
+PROJECT = {
+    "id": 1,
+    "name": "p",
+    "created": "",
+    "alert": False,
+    "alert_chat": "",
+    "max_parallel_tasks": 0,
+    "type": "",
+}
+
+
+def test_not_modified_reuses_the_cached_body(api: FakeApi, client: Client) -> None:
+    api.route("GET", "/project/1", PROJECT)
+    first = client._get_json_revalidated(f"{client.api_endpoint}/project/1")
+    first["name"] = "mutated by the caller"
+    second = client._get_json_revalidated(f"{client.api_endpoint}/project/1")
+
+    assert second == PROJECT
+    assert "If-None-Match" in api.sent[-1].headers
+
+
+def test_ttl_hit_sends_nothing(api: FakeApi, make_client: MakeClient) -> None:
+    client = make_client(cache_ttl=60)
+    api.route("GET", "/project/1", PROJECT)
+    client.get_project(1)
+    client.get_project(1)
+
+    assert api.calls() == ["/api/project/1"]
+
+
+def test_write_expires_the_ttl(api: FakeApi, make_client: MakeClient) -> None:
+    client = make_client(cache_ttl=60)
+    api.route("GET", "/project/1", PROJECT)
+    api.route("DELETE", "/project/2", None, 204)
+    client.get_project(1)
+    client._request("DELETE", f"{client.api_endpoint}/project/2", expect=(204,))
+    client.get_project(1)
+    client.get_project(1)
+
+    assert api.calls("GET") == ["/api/project/1", "/api/project/1"]
+
+
+def test_fresh_ignores_the_ttl(api: FakeApi, make_client: MakeClient) -> None:
+    client = make_client(cache_ttl=60)
+    api.route("GET", "/project/1", PROJECT)
+    project = client.get_project(1)
+    api.route("GET", "/project/1", {**PROJECT, "name": "renamed elsewhere"})
+    project.refresh()
+
+    assert project.name == "renamed elsewhere"
+    assert api.calls("GET") == ["/api/project/1", "/api/project/1"]
@@ -0,0 +1,64 @@
+import typing
+
+import httpx
+import pytest
+import requests
+
+from semaphoreui_client import Client
+from semaphoreui_client.client import _HTTPXAdapter
+
+from .conftest import HOST
+
+
+def make_client(
+    monkeypatch: pytest.MonkeyPatch, handler: typing.Callable[..., httpx.Response]
+) -> Client:
+    client = Client(HOST, transport="httpx")
+    adapter = client.http.get_adapter(HOST)
+    assert isinstance(adapter, _HTTPXAdapter)
+    mock = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(adapter, "_client", lambda *args: mock)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    return client
+
+
+def test_gateway_errors_are_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    statuses = iter([502, 503, 200])
+    client = make_client(
+        monkeypatch, lambda request: httpx.Response(next(statuses), json={})
+    )
+    client.whoami()
+
+
+def test_post_is_not_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    sent: typing.List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(502)
+
+    client = make_client(monkeypatch, handler)
+    response = client.http.post(f"{client.api_endpoint}/user/tokens")
+    assert response.status_code == 502
+    assert len(sent) == 1
+
+
+@pytest.mark.parametrize(
+    "raised, expected",
+    [
+        (httpx.ConnectTimeout("slow"), requests.ConnectTimeout),
+        (httpx.ReadTimeout("slow"), requests.Timeout),
+        (httpx.ConnectError("refused"), requests.ConnectionError),
+    ],
+)
+def test_transport_errors_are_raised_as_requests_errors(
+    monkeypatch: pytest.MonkeyPatch,
+    raised: Exception,
+    expected: typing.Type[Exception],
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise raised
+
+    client = make_client(monkeypatch, handler)
+    with pytest.raises(expected):
+        client.whoami()
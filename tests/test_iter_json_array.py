@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from semaphoreui_client.client import _iter_json_array
+
+
+def chunked(body: bytes, size: int) -> list[bytes]:
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+ITEMS = [
+    {"output": "first line", "time": "2024-01-01T00:00:00Z"},
+    {"output": "naïve — ünïcödé ✓ 🚀", "nested": {"list": [1, 2.5, None]}},
+    12345,
+    'a string with "escapes" and , commas ] brackets',
+    [],
+    True,
+    None,
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 65536])
+def test_any_chunk_boundary(size: int) -> None:
+    body = json.dumps(ITEMS, ensure_ascii=False).encode()
+    assert list(_iter_json_array(chunked(body, size))) == ITEMS
+
+
+def test_whitespace_between_items() -> None:
+    body = b' \n[ 1 ,\n\t2 , {"a": 3} ]\r\n'
+    assert list(_iter_json_array(chunked(body, 1))) == [1, 2, {"a": 3}]
+
+
+def test_multibyte_character_split_across_chunks() -> None:
+    body = '["é🚀"]'.encode()
+    # Split inside both the two-byte and the four-byte sequence.
+    chunks = [body[:3], body[3:5], body[5:8], body[8:]]
+    assert list(_iter_json_array(chunks)) == ["é🚀"]
+
+
+def test_number_split_across_chunks() -> None:
+    assert list(_iter_json_array([b"[12", b"34, 5", b"6]"])) == [1234, 56]
+
+
+def test_empty_array() -> None:
+    assert list(_iter_json_array([b"[", b"]"])) == []
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'[{"a":1},{"b":',
+        b"[1, 2",
+        b"[1,",
+        b"[",
+        b"",
+        b'["unterminated',
+    ],
+)
+def test_truncated_body_raises(body: bytes) -> None:
+    with pytest.raises(ValueError):
+        list(_iter_json_array(chunked(body, 3)))
+
+
+def test_truncated_body_yields_complete_items_first() -> None:
+    items = _iter_json_array([b'[{"a":1},{"b":'])
+    assert next(items) == {"a": 1}
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_truncated_multibyte_character_raises() -> None:
+    with pytest.raises(ValueError):
+        list(_iter_json_array(['["é'.encode()[:-1]]))
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b'{"a": 1}', b"1", b'"text"', b"null", b"<html></html>"],
+)
+def test_non_array_body_raises(body: bytes) -> None:
+    with pytest.raises(ValueError):
+        list(_iter_json_array([body]))
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"[1] 2", b"[1]]", b"[][]", b"[1 2]", b"[1,,2]", b"[1,]", b"[,1]", b"[1}"],
+)
+def test_malformed_array_raises(body: bytes) -> None:
+    with pytest.raises(ValueError):
+        list(_iter_json_array(chunked(body, 2)))
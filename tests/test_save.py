@@ -0,0 +1,31 @@
+from semaphoreui_client import Client
+
+from .conftest import FakeApi
+
+PROJECT = {
+    "id": 1,
+    "name": "p",
+    "created": "",
+    "alert": False,
+    "alert_chat": "",
+    "max_parallel_tasks": 0,
+    "type": "",
+}
+
+
+def test_unchanged_save_sends_nothing(api: FakeApi, client: Client) -> None:
+    api.route("GET", "/project/1", PROJECT)
+    api.route("PUT", "/project/1", None, 204)
+    project = client.get_project(1)
+
+    project.name = "renamed"
+    project.save()
+    project.save()
+    assert api.calls("PUT") == ["/api/project/1"]
+
+    project.save(force=True)
+    assert api.calls("PUT") == ["/api/project/1", "/api/project/1"]
+
+    project.alert = True
+    project.save()
+    assert len(api.calls("PUT")) == 3